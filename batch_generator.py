@@ -12,6 +12,7 @@ os.environ["PATH"] = bin_dir + os.pathsep + os.environ["PATH"]
 
 from utils.text_splitter import split_text
 from utils.audio_merger import merge_audio_files
+from utils.chunk_journal import ChunkJournal
 
 # main.py から定数とロジックをインポートしたいが、
 # main.py はスクリプトとして書かれている部分が多いので、必要な部分だけ再定義するか、
@@ -24,10 +25,18 @@ GEMINI_TTS_MODELS = {
     "gemini-2.5-flash-preview-tts": "Gemini 2.5 Flash プレビュー（高速・低コスト）",
 }
 
+def positive_int(value: str) -> int:
+    """argparse 用: 1以上の整数のみ受け付ける"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1以上の整数を指定してください: {value}")
+    return number
+
 def synthesize_segment(
     client,
     text: str,
-    out_path: str,
+    journal: ChunkJournal,
+    index: int,
     model_name: str = "gemini-2.5-pro-preview-tts",
     speaker: str = "Kore",
     prompt: str = None,
@@ -35,6 +44,9 @@ def synthesize_segment(
 ):
     """
     短いテキストセグメントを音声化して保存する
+
+    音声は一時ファイル経由で journal.chunk_path(index) に保存され、
+    保存に成功したチャンクだけがジャーナルに記録される。
     """
     # デフォルトプロンプト
     if prompt is None:
@@ -57,6 +69,8 @@ def synthesize_segment(
         sample_rate_hertz=24000,
     )
 
+    out_path = journal.chunk_path(index)
+
     try:
         response = client.synthesize_speech(
             input=input_text,
@@ -64,8 +78,9 @@ def synthesize_segment(
             audio_config=audio_config,
         )
         
-        with open(out_path, "wb") as f:
-            f.write(response.audio_content)
+        if not journal.commit(index, response.audio_content, text):
+            print(f"\nInvalid MP3 data received for segment: {out_path}")
+            return False
             
         return True
     
@@ -78,7 +93,9 @@ def process_book(
     book_dir: str,
     model_name: str = "gemini-2.5-pro-preview-tts",
     speaker: str = "Kore",
-    prompt: str = None
+    prompt: str = None,
+    verify: bool = False,
+    verify_workers: int = 8
 ):
     """
     本のディレクトリ構造を読み込んで一括変換する
@@ -86,6 +103,11 @@ def process_book(
       book_dir/
         raw/  <- テキストファイル (.txt)
         audio/ <- 出力先
+
+    Args:
+        verify: 再開時に既存チャンクのハッシュとMP3フレームを検証し、
+                破損していれば再生成する
+        verify_workers: 検証に使うスレッド数
     """
     raw_dir = os.path.join(book_dir, "raw")
     audio_output_dir = os.path.join(book_dir, "audio")
@@ -125,35 +147,64 @@ def process_book(
         chapter_audio_dir = os.path.join(audio_output_dir, file_base_name)
         os.makedirs(chapter_audio_dir, exist_ok=True)
         
-        for i, chunk in enumerate(tqdm(chunks, desc="Synthesizing")):
-            # ファイル名: 001.mp3, 002.mp3 ...
-            out_name = f"{i+1:03d}.mp3"
-            out_path = os.path.join(chapter_audio_dir, out_name)
-            
-            # すでに存在する場合はスキップ（再開機能）
-            if os.path.exists(out_path) and os.path.getsize(out_path) > 0:
-                continue
-            
-            success = synthesize_segment(
-                client=client,
-                text=chunk,
-                out_path=out_path,
-                model_name=model_name,
-                speaker=speaker,
-                prompt=prompt
-            )
-            
-            if not success:
-                print("Stopping due to error.")
-                return
+        # 完了済みチャンクはジャーナルから判定する（再開機能）
+        journal = ChunkJournal(chapter_audio_dir)
+        journal_exists = os.path.exists(journal.path)
+        journal.load()
+        
+        # 分割数が減った場合、範囲外の古いチャンクが結合に混ざらないよう削除する
+        for path in journal.prune(len(chunks)):
+            print(f"  -> Removed stale chunk: {path}")
+        
+        if journal_exists:
+            completed = journal.completed(chunks)
+        else:
+            # ジャーナル導入前に生成されたファイルは、MP3として読めるものだけ引き継ぐ
+            completed = journal.adopt_existing(chunks, max_workers=verify_workers)
+        
+        if verify and completed:
+            corrupted = journal.verify(completed, max_workers=verify_workers)
+            for i in sorted(corrupted):
+                print(f"  -> Corrupted chunk detected, re-queued: {journal.chunk_path(i)}")
+                journal.invalidate(i)
+            completed -= corrupted
+        
+        if completed:
+            print(f"  -> Resuming: {len(completed)}/{len(chunks)} chunks already done.")
+        
+        pending = [i for i in range(len(chunks)) if i not in completed]
+        while True:
+            for i in tqdm(pending, desc="Synthesizing"):
+                success = synthesize_segment(
+                    client=client,
+                    text=chunks[i],
+                    journal=journal,
+                    index=i,
+                    model_name=model_name,
+                    speaker=speaker,
+                    prompt=prompt
+                )
+                
+                if not success:
+                    print("Stopping due to error.")
+                    return
 
-            # レート制限回避のためのSleep
-            time.sleep(1.0) 
+                # レート制限回避のためのSleep
+                time.sleep(1.0) 
+            
+            # 結合前に、完了済みのはずのファイルが消えていないか確認し、消えていれば再生成する
+            pending = journal.missing(len(chunks))
+            if not pending:
+                break
+            for i in pending:
+                print(f"  -> Missing chunk detected, re-queued: {journal.chunk_path(i)}")
+                journal.invalidate(i)
 
-        # 全チャンクの生成が完了したら結合
-        print(f"  -> Merging audio files for {file_base_name}...")
+        # 全チャンクの生成が完了したら、ジャーナル上のチャンクだけを順番に結合
+        chunk_files = [journal.chunk_path(i) for i in range(len(chunks))]
+        print(f"  -> Merging audio files for {file_base_name} ({journal.total_duration(set(range(len(chunks)))):.1f} sec)...")
         combined_output_path = os.path.join(audio_output_dir, f"{file_base_name}_combined.mp3")
-        merge_audio_files(chapter_audio_dir, combined_output_path)
+        merge_audio_files(chapter_audio_dir, combined_output_path, mp3_files=chunk_files)
 
     print("\nProcessing complete!")
 
@@ -163,6 +214,8 @@ if __name__ == "__main__":
     parser.add_argument("--model", default="gemini-2.5-pro-preview-tts", help="Gemini TTS Model")
     parser.add_argument("--speaker", default="Kore", help="Speaker name")
     parser.add_argument("--prompt", default=None, help="Style prompt")
+    parser.add_argument("--verify", action="store_true", help="Verify existing chunks (hash and MP3 frames) before resuming")
+    parser.add_argument("--verify-workers", type=positive_int, default=8, help="Number of threads used for verification")
     
     args = parser.parse_args()
     
@@ -170,5 +223,7 @@ if __name__ == "__main__":
         book_dir=args.book_dir,
         model_name=args.model,
         speaker=args.speaker,
-        prompt=args.prompt
+        prompt=args.prompt,
+        verify=args.verify,
+        verify_workers=args.verify_workers
     )
@@ -1,6 +1,11 @@
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import texttospeech
 
+from utils.text_splitter import split_text_by_bytes
+from utils.mp3_frames import audio_frames
+from utils.atomic_file import atomic_open
+
 # Gemini-TTSモデル
 GEMINI_TTS_MODELS = {
     "gemini-2.5-pro-preview-tts": "Gemini 2.5 Pro プレビュー（最高品質・推奨）",
@@ -19,6 +24,14 @@ GEMINI_TTS_SPEAKERS = [
 # 日本語用推奨話者
 JAPANESE_RECOMMENDED_SPEAKERS = ["Kore", "Charon", "Callirhoe", "Aoede"]
 
+# 1リクエストあたりのテキスト上限（バイト）
+# Gemini-TTS の text フィールドは 4000 バイトまで（従来モデルは 5000 バイト）
+MAX_REQUEST_BYTES = 4000
+
+# 長文を分割した場合の同時リクエスト数の上限
+# チャンク数がこれ以下なら全チャンクを同時に送るので、待ち時間は最も遅いチャンクで決まる
+MAX_PARALLEL_REQUESTS = 16
+
 # よく使う日本語ボイスのプリセット（従来のモデル）
 VOICE_PRESETS = {
     # Standard（標準）: 少し機械的だが安い
@@ -39,6 +52,13 @@ VOICE_PRESETS = {
     "studio_male": "ja-JP-Studio-C",        # 男性（Studioボイス）
 }
 
+def positive_int(value: str) -> int:
+    """argparse 用: 1以上の整数のみ受け付ける"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1以上の整数を指定してください: {value}")
+    return number
+
 def synthesize(
     text: str, 
     out_path: str = "output.mp3",
@@ -50,11 +70,15 @@ def synthesize(
     speaking_rate: float = 1.0,
     pitch: float = 0.0,
     volume_gain_db: float = 0.0,
-    sample_rate_hertz: int = 24000
+    sample_rate_hertz: int = 24000,
+    max_workers: int = None
 ):
     """
     テキストを音声に変換してファイルに保存
     
+    1リクエストの上限（MAX_REQUEST_BYTES）を超える長文は文の区切りで自動分割し、
+    1つのクライアントで並列にリクエストしたうえで、順番通りに1ファイルへ結合する。
+    
     Args:
         text: 音声化するテキスト
         out_path: 出力ファイルパス（デフォルト: output.mp3）
@@ -69,7 +93,12 @@ def synthesize(
         volume_gain_db: 音量ゲイン（-96.0～16.0 dB、デフォルト: 0.0）
         sample_rate_hertz: サンプリングレート（8000, 16000, 22050, 24000, 32000, 44100, 48000）
                           デフォルト: 24000（高品質）
+        max_workers: 長文を分割した場合の同時リクエスト数
+                     デフォルト: チャンク数（上限 MAX_PARALLEL_REQUESTS）
     """
+    if max_workers is not None and max_workers < 1:
+        raise ValueError(f"max_workers は1以上を指定してください: {max_workers}")
+    
     # クライアントを作成（プロジェクトIDは環境変数やgcloudの設定から自動検出される）
     client = texttospeech.TextToSpeechClient()
     
@@ -85,7 +114,8 @@ def synthesize(
                 prompt = "Say the following in a natural and friendly way."
         
         # Gemini-TTS用の入力（textとpromptの両方を指定）
-        input_text = texttospeech.SynthesisInput(text=text, prompt=prompt)
+        def build_input(chunk):
+            return texttospeech.SynthesisInput(text=chunk, prompt=prompt)
         
         # Gemini-TTS用のボイス設定
         voice = texttospeech.VoiceSelectionParams(
@@ -109,7 +139,8 @@ def synthesize(
         else:
             actual_voice_name = voice_name
         
-        input_text = texttospeech.SynthesisInput(text=text)
+        def build_input(chunk):
+            return texttospeech.SynthesisInput(text=chunk)
         
         voice = texttospeech.VoiceSelectionParams(
             language_code=language_code,
@@ -125,15 +156,46 @@ def synthesize(
         sample_rate_hertz=sample_rate_hertz,
     )
     
-    try:
+    # 上限を超える場合は文の区切りで分割（UTF-8 のバイト長で判定）
+    chunks = split_text_by_bytes(text, max_bytes=MAX_REQUEST_BYTES)
+    if not chunks:
+        raise ValueError("音声化するテキストが空です")
+    if len(chunks) > 1:
+        print(f"Text is too long for a single request. Split into {len(chunks)} chunks.")
+    
+    def fetch(chunk):
+        # rate/pitch/volume/sample-rate は全チャンク共通の audio_config を使う
         response = client.synthesize_speech(
-            input=input_text,
+            input=build_input(chunk),
             voice=voice,
             audio_config=audio_config,
         )
-        
-        with open(out_path, "wb") as f:
-            f.write(response.audio_content)
+        return response.audio_content
+    
+    try:
+        # 一時ファイルに書き込んでから rename（失敗時に中途半端なファイルを残さない）
+        with atomic_open(out_path) as f:
+            if len(chunks) == 1:
+                f.write(fetch(chunks[0]))
+            else:
+                if max_workers is None:
+                    max_workers = min(len(chunks), MAX_PARALLEL_REQUESTS)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [executor.submit(fetch, chunk) for chunk in chunks]
+                    try:
+                        # 完了を順番に待ちながら書き出す。全チャンクを同時に送れる場合
+                        # （チャンク数 <= max_workers）、全体の待ち時間は最も遅いチャンクで決まる
+                        # MP3 はフレーム単位で連結できるため、各断片の音声フレームだけを書き出す
+                        # （ID3 タグや Xing/Info ヘッダが途中に混ざると再生時間やシークが狂う）
+                        for i, future in enumerate(futures):
+                            frames = audio_frames(future.result())
+                            if frames is None:
+                                raise ValueError(f"チャンク {i+1} の音声データが不正です")
+                            f.write(frames)
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()
+                        raise
         
         if model_name and model_name in GEMINI_TTS_MODELS:
             print(f"Saved: {out_path} (Model: {model_name}, Speaker: {speaker})")
@@ -226,6 +288,9 @@ if __name__ == "__main__":
   # 出力ファイル名を指定
   python main.py --text "こんにちは" --out hello.mp3
 
+  # 長文（自動で分割・並列生成・結合）
+  python main.py --text "$(cat story.txt)" --out story.mp3
+
   # 利用可能なボイス一覧を表示
   python main.py --list-voices
         """
@@ -311,6 +376,13 @@ if __name__ == "__main__":
         help="サンプリングレート（デフォルト: 24000 - 高品質）"
     )
     
+    parser.add_argument(
+        "--workers", "-w",
+        type=positive_int,
+        default=None,
+        help=f"長文を分割した場合の同時リクエスト数（デフォルト: チャンク数、上限 {MAX_PARALLEL_REQUESTS}）"
+    )
+    
     parser.add_argument(
         "--list-voices", "-l",
         action="store_true",
@@ -334,6 +406,7 @@ if __name__ == "__main__":
             speaking_rate=args.rate,
             pitch=args.pitch,
             volume_gain_db=args.volume,
-            sample_rate_hertz=args.sample_rate
+            sample_rate_hertz=args.sample_rate,
+            max_workers=args.workers
         )
 
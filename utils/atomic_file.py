@@ -0,0 +1,38 @@
+import os
+import uuid
+from contextlib import contextmanager
+
+# 一時ファイルに書き込んでから rename することで、
+# 書き込み途中でクラッシュしても中途半端な内容のファイルを残さないためのヘルパー
+
+TEMP_SUFFIX = ".tmp"
+
+
+@contextmanager
+def atomic_open(path: str):
+    """
+    path への書き込みを一時ファイル経由で行うファイルオブジェクトを返す。
+    with ブロックを抜けると rename で確定し、ブロック内で例外が発生した場合は
+    path を変更せずに一時ファイルを削除する。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    # 一時ファイル名は .mp3 で終わらせない（結合対象の glob に拾われないように）
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}{TEMP_SUFFIX}")
+    # 0666 で作成し、通常の open() と同じくカーネルに umask を適用させる
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    """data を atomic_open 経由で path に書き込む"""
+    with atomic_open(path) as f:
+        f.write(data)
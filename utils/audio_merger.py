@@ -1,5 +1,6 @@
 import os
 import glob
+from typing import List
 
 # プロジェクト内の bin フォルダを PATH に追加 (ffmpeg用)
 # 親ディレクトリの bin フォルダを探す
@@ -11,16 +12,19 @@ if os.path.exists(bin_dir):
 
 from pydub import AudioSegment
 
-def merge_audio_files(input_dir: str, output_file: str):
+def merge_audio_files(input_dir: str, output_file: str, mp3_files: List[str] = None):
     """
     指定されたディレクトリ内のMP3ファイルを名前順に結合して保存する。
     
     Args:
         input_dir: 結合したいMP3ファイルが入っているディレクトリ (001.mp3, 002.mp3...)
         output_file: 結合後の出力ファイルパス
+        mp3_files: 結合するファイルのリスト（この順に結合する）
+                   省略した場合は input_dir 内の全MP3ファイル
     """
     # MP3ファイルを取得してソート
-    mp3_files = sorted(glob.glob(os.path.join(input_dir, "*.mp3")))
+    if mp3_files is None:
+        mp3_files = sorted(glob.glob(os.path.join(input_dir, "*.mp3")))
     
     if not mp3_files:
         print(f"Warning: No mp3 files found in {input_dir}")
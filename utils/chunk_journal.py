@@ -0,0 +1,228 @@
+import os
+import re
+import glob
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
+
+from utils.mp3_frames import scan_mp3
+from utils.atomic_file import TEMP_SUFFIX, atomic_write_bytes
+
+# 章ごとのチャンク生成状況を記録するジャーナル
+#
+# ファイル構成（章ディレクトリ内）:
+#   001.mp3, 002.mp3 ...  <- チャンク音声（一時ファイルから rename で確定）
+#   journal.jsonl         <- 確定したチャンクの記録（1行1レコード、追記のみ）
+#
+# 追記のみの形式なので、書き込み途中でクラッシュしても壊れるのは最終行だけで、
+# その行は読み込み時に無視される（= そのチャンクは未完了として再生成される）。
+
+JOURNAL_FILENAME = "journal.jsonl"
+_CHUNK_FILE_PATTERN = re.compile(r"^(\d+)\.mp3$")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _text_hash(text: str) -> str:
+    return _sha256(text.encode("utf-8"))
+
+
+class ChunkJournal:
+    """
+    章ディレクトリ単位のチャンク生成ジャーナル
+
+    各チャンクについて、音声データの SHA-256・バイト長・再生時間と
+    元テキストのハッシュを記録する。再開時はジャーナルを1回読むだけで
+    完了済みチャンクが分かるため、チャンクファイルごとの stat は不要。
+    """
+
+    def __init__(self, chapter_dir: str):
+        self.chapter_dir = chapter_dir
+        self.path = os.path.join(chapter_dir, JOURNAL_FILENAME)
+        self.entries: Dict[int, dict] = {}
+
+    def chunk_path(self, index: int) -> str:
+        """チャンク番号（0始まり）に対応する音声ファイルのパス"""
+        return os.path.join(self.chapter_dir, f"{index+1:03d}.mp3")
+
+    def load(self) -> Dict[int, dict]:
+        """
+        ジャーナルを読み込む。
+
+        同じチャンクのレコードが複数ある場合は後のものが優先される。
+        壊れた行（クラッシュ時の書きかけ）は無視する。
+        """
+        self.entries = {}
+        self._remove_temp_files()
+
+        if not os.path.exists(self.path):
+            return self.entries
+
+        with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().split("\n")
+
+        # 最終行が書きかけの場合、次の追記と繋がらないよう改行で閉じておく
+        if lines[-1]:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n")
+
+        for line in lines:
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                index = int(record["index"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            if record.get("status") == "invalid":
+                self.entries.pop(index, None)
+            else:
+                self.entries[index] = record
+
+        return self.entries
+
+    def completed(self, chunks: List[str]) -> Set[int]:
+        """
+        ジャーナル上で完了済みのチャンク番号を返す。
+        テキストが変わったチャンク（分割結果が変わった場合など）は未完了扱い。
+        """
+        return {
+            i for i, chunk in enumerate(chunks)
+            if i in self.entries and self.entries[i].get("text_sha256") == _text_hash(chunk)
+        }
+
+    def commit(self, index: int, audio_content: bytes, text: str) -> bool:
+        """
+        チャンク音声を検証・保存し、ジャーナルに記録する。
+
+        Returns:
+            音声データが MP3 として正しく読めた場合は True
+        """
+        duration = scan_mp3(audio_content)
+        if duration is None:
+            return False
+
+        out_path = self.chunk_path(index)
+        atomic_write_bytes(out_path, audio_content)
+        self._append({
+            "index": index,
+            "file": os.path.basename(out_path),
+            "sha256": _sha256(audio_content),
+            "bytes": len(audio_content),
+            "duration": round(duration, 3),
+            "text_sha256": _text_hash(text),
+        })
+        return True
+
+    def invalidate(self, index: int):
+        """チャンクを未完了に戻す（次回の再開時にも再生成対象になる）"""
+        self.entries.pop(index, None)
+        self._append({"index": index, "status": "invalid"})
+
+    def verify(self, indices: Set[int], max_workers: int = 8) -> Set[int]:
+        """
+        完了済みチャンクのファイルを並列に検証し、破損しているチャンク番号を返す。
+
+        バイト長・SHA-256 がジャーナルと一致し、MP3 フレームが末尾まで
+        正しく続いていることを確認する。
+        """
+        def is_corrupted(index: int) -> bool:
+            entry = self.entries[index]
+            try:
+                with open(self.chunk_path(index), "rb") as f:
+                    data = f.read()
+            except OSError:
+                return True
+            if len(data) != entry.get("bytes") or _sha256(data) != entry.get("sha256"):
+                return True
+            return scan_mp3(data) is None
+
+        ordered = sorted(indices)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(is_corrupted, ordered)
+            return {i for i, bad in zip(ordered, results) if bad}
+
+    def adopt_existing(self, chunks: List[str], max_workers: int = 8) -> Set[int]:
+        """
+        ジャーナル導入前に生成されたチャンクファイルを取り込む。
+
+        ジャーナルが存在しない章でのみ使う想定。MP3 として末尾まで
+        読めるファイルだけを完了済みとして記録し、その番号を返す。
+        """
+        def inspect(index: int) -> Optional[dict]:
+            try:
+                with open(self.chunk_path(index), "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+            duration = scan_mp3(data)
+            if duration is None:
+                return None
+            return {
+                "index": index,
+                "file": os.path.basename(self.chunk_path(index)),
+                "sha256": _sha256(data),
+                "bytes": len(data),
+                "duration": round(duration, 3),
+                "text_sha256": _text_hash(chunks[index]),
+            }
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            records = list(executor.map(inspect, range(len(chunks))))
+
+        adopted = set()
+        for record in records:
+            if record is None:
+                continue
+            self._append(record)
+            adopted.add(record["index"])
+        return adopted
+
+    def missing(self, count: int) -> List[int]:
+        """ファイルが存在しないチャンク番号を返す（結合直前の確認用）"""
+        return [i for i in range(count) if not os.path.exists(self.chunk_path(i))]
+
+    def prune(self, count: int) -> List[str]:
+        """
+        チャンク数が減った場合に、範囲外（count 以降）のチャンクファイルと記録を削除する。
+
+        Returns:
+            削除したファイルのパス
+        """
+        removed = []
+        for name in os.listdir(self.chapter_dir):
+            match = _CHUNK_FILE_PATTERN.match(name)
+            if match and int(match.group(1)) > count:
+                path = os.path.join(self.chapter_dir, name)
+                os.remove(path)
+                removed.append(path)
+
+        for index in sorted(i for i in self.entries if i >= count):
+            self.invalidate(index)
+
+        return sorted(removed)
+
+    def total_duration(self, indices: Optional[Set[int]] = None) -> float:
+        """記録済みチャンクの合計再生時間（秒）"""
+        keys = self.entries.keys() if indices is None else indices
+        return sum(self.entries[i].get("duration", 0.0) for i in keys if i in self.entries)
+
+    def _append(self, record: dict):
+        """1レコードを追記し、ディスクへ確実に書き出す"""
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if record.get("status") != "invalid":
+            self.entries[record["index"]] = record
+
+    def _remove_temp_files(self):
+        """クラッシュ時に残った書きかけの一時ファイルを削除する"""
+        for tmp_path in glob.glob(os.path.join(self.chapter_dir, f".*{TEMP_SUFFIX}")):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
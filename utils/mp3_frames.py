@@ -0,0 +1,187 @@
+from typing import List, Optional, Tuple
+
+# MPEG Audio Layer III のフレームヘッダ解析
+# Text-to-Speech API の MP3 出力（Layer III）を前提とし、
+# ffmpeg を使わずにファイルの破損（途中で切れたフレーム等）を検出する。
+
+# ビットレート表（kbps）: [MPEG1, MPEG2/2.5] の Layer III
+_BITRATES_KBPS = {
+    "mpeg1": [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],
+    "mpeg2": [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0],
+}
+
+# サンプリングレート表（Hz）: バージョンIDビット -> 値
+_SAMPLE_RATES = {
+    0b11: [44100, 48000, 32000],  # MPEG1
+    0b10: [22050, 24000, 16000],  # MPEG2
+    0b00: [11025, 12000, 8000],   # MPEG2.5
+}
+
+_ID3V1_SIZE = 128
+
+# 最後のフレームの後ろに置かれることがあるタグの先頭シグネチャ
+# （APEv2 ヘッダ、Lyrics3、末尾に付けられた ID3v2）
+_TRAILING_TAG_SIGNATURES = (b"APETAGEX", b"LYRICSBEGIN", b"ID3")
+
+_APE_FOOTER_SIZE = 32
+
+
+def _id3v2_size(data: bytes) -> int:
+    """先頭の ID3v2 タグのバイト数を返す（タグがなければ 0）"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    # サイズは synchsafe integer（各バイト下位7bit）
+    size = 0
+    for b in data[6:10]:
+        size = (size << 7) | (b & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _parse_frame_header(data: bytes, pos: int) -> Optional[Tuple[int, int, int]]:
+    """
+    pos 位置のフレームヘッダを解析する。
+
+    Returns:
+        (フレーム長バイト, フレーム内サンプル数, サンプリングレート)
+        ヘッダとして不正な場合は None
+    """
+    if pos + 4 > len(data):
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    # 同期ワード（11bit）
+    if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer = (b1 >> 1) & 0x03
+    if version == 0b01 or layer != 0b01:  # 予約値 / Layer III 以外
+        return None
+
+    bitrate_index = (b2 >> 4) & 0x0F
+    sample_rate_index = (b2 >> 2) & 0x03
+    padding = (b2 >> 1) & 0x01
+    if bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    is_mpeg1 = version == 0b11
+    bitrate = _BITRATES_KBPS["mpeg1" if is_mpeg1 else "mpeg2"][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+
+    if is_mpeg1:
+        frame_length = 144 * bitrate // sample_rate + padding
+        samples = 1152
+    else:
+        frame_length = 72 * bitrate // sample_rate + padding
+        samples = 576
+
+    return frame_length, samples, sample_rate
+
+
+def _is_info_frame(data: bytes, pos: int) -> bool:
+    """
+    pos 位置のフレームが Xing/Info（LAME）または VBRI ヘッダフレームかどうか。
+    これらは音声を含まず、ファイル全体のフレーム数・再生時間を記録している。
+    """
+    version = (data[pos + 1] >> 3) & 0x03
+    is_mono = (data[pos + 3] >> 6) & 0x03 == 0b11
+    # Xing/Info タグはサイドインフォメーションの直後に置かれる
+    if version == 0b11:
+        side_info = 17 if is_mono else 32
+    else:
+        side_info = 9 if is_mono else 17
+    offset = pos + 4 + side_info
+    if data[offset:offset + 4] in (b"Xing", b"Info"):
+        return True
+    # VBRI タグはヘッダ直後から 32 バイトの固定位置
+    return data[pos + 36:pos + 40] == b"VBRI"
+
+
+def _audio_end(data: bytes, start: int) -> int:
+    """末尾の ID3v1 タグと APE タグ（フッタのみの形式を含む）を除いた終端位置を返す"""
+    end = len(data)
+    # 末尾の ID3v1 タグ
+    if end - start >= _ID3V1_SIZE and data[end - _ID3V1_SIZE:end - _ID3V1_SIZE + 3] == b"TAG":
+        end -= _ID3V1_SIZE
+
+    # APE タグのフッタ（タグサイズはフッタを含みヘッダを含まない、リトルエンディアン）
+    footer = end - _APE_FOOTER_SIZE
+    if footer >= start and data[footer:footer + 8] == b"APETAGEX":
+        size = int.from_bytes(data[footer + 12:footer + 16], "little")
+        flags = int.from_bytes(data[footer + 20:footer + 24], "little")
+        has_header = bool(flags & 0x80000000)
+        tag_start = end - size - (_APE_FOOTER_SIZE if has_header else 0)
+        if start <= tag_start <= footer:
+            end = tag_start
+
+    return end
+
+
+def _scan_frames(data: bytes) -> Optional[List[Tuple[int, int, int, int]]]:
+    """
+    先頭からフレームを辿り、(位置, フレーム長, サンプル数, サンプリングレート) のリストを返す。
+
+    先頭の Xing/Info/VBRI ヘッダフレームは含めない。
+    最後のフレームが途中で切れている（書き込み途中でのクラッシュ）場合や、
+    音声フレームが1つもない場合は None を返す。最後のフレームの後ろには
+    既知のタグ（ID3v1、APE、Lyrics3、ID3v2）だけを許し、それ以外のデータ
+    （クラッシュで残ったゼロ埋めや途中の破損など）がある場合も None を返す。
+    """
+    pos = _id3v2_size(data)
+    end = _audio_end(data, pos)
+
+    frames = []
+    while pos < end:
+        header = _parse_frame_header(data, pos) if end - pos >= 4 else None
+        if header is None:
+            # フレームでなければ既知のタグで終わっている場合のみ正常とみなす
+            if any(data.startswith(sig, pos) for sig in _TRAILING_TAG_SIGNATURES):
+                break
+            return None
+        frame_length, samples, sample_rate = header
+        if pos + frame_length > end:
+            # 書き込み途中で切れたフレーム
+            return None
+        # 先頭の Xing/Info/VBRI フレームは音声ではないので除外
+        if frames or not _is_info_frame(data, pos):
+            frames.append((pos, frame_length, samples, sample_rate))
+        pos += frame_length
+
+    return frames or None
+
+
+def scan_mp3(data: bytes) -> Optional[float]:
+    """
+    MP3 データのフレームヘッダを先頭から辿り、再生時間を求める。
+
+    最後のフレームが途中で切れている場合や、フレームの間・後ろに
+    タグ以外のデータがある場合は破損とみなす。
+
+    Args:
+        data: MP3 ファイルの内容
+
+    Returns:
+        再生時間（秒）。破損している場合は None
+    """
+    frames = _scan_frames(data)
+    if frames is None:
+        return None
+    return sum(samples / sample_rate for _, _, samples, sample_rate in frames)
+
+
+def audio_frames(data: bytes) -> Optional[bytes]:
+    """
+    MP3 データから音声フレームだけを取り出す。
+
+    ID3 タグ、先頭の Xing/Info/VBRI ヘッダフレーム、末尾のタグを除くため、
+    複数の MP3 をそのまま連結しても途中にヘッダが混ざらない。
+    （ヘッダフレームが残っていると、プレーヤーが最初の断片の長さを
+    ファイル全体の長さとして表示し、シークもずれる）
+
+    Returns:
+        音声フレームを連結したバイト列。破損している場合は None
+    """
+    frames = _scan_frames(data)
+    if frames is None:
+        return None
+    return b"".join(data[pos:pos + length] for pos, length, _, _ in frames)
@@ -106,6 +106,82 @@ def split_text(text: str, max_chars: int = 1500) -> List[str]:
 
     return chunks
 
+# 文の区切り: 句点・感嘆符・疑問符・改行の直後、または英文のピリオド＋空白
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[。！？!?\n])|(?<=\.)(?=\s)')
+
+# 一文が長すぎる場合に、強制分割より優先して使う区切り
+_SOFT_BREAKS = "、，, "
+
+
+def _cut_by_bytes(sentence: str, max_bytes: int) -> List[str]:
+    """
+    1文を UTF-8 で max_bytes 以下になるよう分割する。
+    読点や空白があればそこで、なければ文字境界で強制的に区切る。
+    """
+    pieces = []
+    while len(sentence.encode("utf-8")) > max_bytes:
+        # max_bytes に収まる最長の文字数を求める
+        size = 0
+        cut = 0
+        for ch in sentence:
+            size += len(ch.encode("utf-8"))
+            if size > max_bytes:
+                break
+            cut += 1
+
+        # 後半に読点・空白があればその直後で区切る
+        soft = max(sentence.rfind(c, 0, cut) for c in _SOFT_BREAKS)
+        if soft >= cut // 2:
+            cut = soft + 1
+
+        pieces.append(sentence[:cut])
+        sentence = sentence[cut:]
+
+    pieces.append(sentence)
+    return pieces
+
+
+def split_text_by_bytes(text: str, max_bytes: int) -> List[str]:
+    """
+    長文を UTF-8 のバイト長が max_bytes 以下になるよう分割する。
+    APIのリクエスト上限（バイト単位）に合わせて分割したい場合に使う。
+    
+    文の区切り（。！？!? 改行、英文のピリオド）を優先し、
+    それでも収まらない一文は読点・空白、最終的には文字境界で強制分割する。
+    空白だけのチャンクは含まれない。
+    
+    Args:
+        text: 分割対象のテキスト
+        max_bytes: 1チャンクあたりの最大バイト数（UTF-8）
+    
+    Returns:
+        分割されたテキストのリスト（空白のみのテキストの場合は空リスト）
+    
+    Raises:
+        ValueError: max_bytes が UTF-8 の1文字の最大長（4バイト）未満の場合
+    """
+    # 1文字も入らないチャンクでは分割が進まないため、最低でも1文字分は必要
+    if max_bytes < 4:
+        raise ValueError(f"max_bytes must be at least 4: {max_bytes}")
+
+    chunks = []
+    current = ""
+    current_bytes = 0
+
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        for piece in _cut_by_bytes(sentence, max_bytes):
+            piece_bytes = len(piece.encode("utf-8"))
+            if current_bytes + piece_bytes > max_bytes:
+                chunks.append(current)
+                current = ""
+                current_bytes = 0
+            current += piece
+            current_bytes += piece_bytes
+
+    chunks.append(current)
+
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
 if __name__ == "__main__":
     # テスト用
     sample_text = "これはテストです。" * 100